@@ -1,134 +1,165 @@
+import mmap
+import os
 import re
 from collections import Counter
+from multiprocessing import Pool
 import chess
 import chess.pgn
 
-# Load the PGN data directly
-with open('lichess_KempBrdy_2025-12-15.pgn', 'r') as f:
-    pgn_content = f.read()
-
-# Split into individual games - PGN games are separated by blank lines
-games = []
-current_game = []
-for line in pgn_content.split('\n'):
-    if line.strip() == '':
-        if current_game:
-            games.append('\n'.join(current_game))
-            current_game = []
-    else:
-        current_game.append(line)
-
-if current_game:
-    games.append('\n'.join(current_game))
-
-print(f"Found {len(games)} games")
-print("=" * 50)
-
-# Analyze each game
-opening_moves = []
-tactical_patterns = []
-time_controls = []
-results = []
-white_wins = 0
-black_wins = 0
-draws = 0
-
-for i, game_text in enumerate(games):
-    if not game_text.strip():
-        continue
-        
-    # Parse PGN headers
+PGN_PATH = 'lichess_KempBrdy_2025-12-15.pgn'
+
+# One pass over the PGN: each match is either a header tag or a movetext line
+PGN_TOKEN_RE = re.compile(rb'^\[([^ \r\n]+) "([^"\r\n]*)"\][ \t\r]*$|^([^\[\s][^\r\n]*)', re.MULTILINE)
+
+# A game starts at the first header line after a blank line
+GAME_START_RE = re.compile(rb'\n[ \t\r]*\n(?=\[)')
+
+# Common tactical patterns in bullet chess, counted per move over all games
+TACTICAL_PATTERNS = {
+    'capture_knight': r'Nx[a-h][1-8](?![+#])',
+    'capture_bishop': r'Bx[a-h][1-8](?![+#])',
+    'capture_queen': r'Qx[a-h][1-8](?![+#])',
+    'checkmate': r'#',
+    'check': r'\+',
+    'castling': r'O-O(?:-O)?',
+}
+
+# All patterns as one alternation so a single scan reports every hit; the
+# patterns never overlap, so the matching group names the pattern
+TACTICAL_RE = re.compile('|'.join(f'(?P<{name}>{pattern})'
+                                  for name, pattern in TACTICAL_PATTERNS.items()))
+
+
+def read_games(pgn_buffer):
+    """Yield (headers, move_line) pairs from a PGN buffer in one regex scan"""
     headers = {}
-    lines = game_text.split('\n')
     move_line = ""
-    
-    for line in lines:
-        if line.startswith('[') and line.endswith(']'):
-            # Extract header
-            match = re.match(r'\[([^ ]+) "([^"]*)"\]', line)
-            if match:
-                headers[match.group(1)] = match.group(2)
-        elif not line.startswith('['):
-            move_line = line
-            break
-    
-    # Extract game info
-    white = headers.get('White', 'Unknown')
-    black = headers.get('Black', 'Unknown')
-    result = headers.get('Result', '*')
-    time_control = headers.get('TimeControl', 'Unknown')
-    eco = headers.get('ECO', 'Unknown')
-    opening = headers.get('Opening', 'Unknown')
-    
-    # Count results when Kemp Brdy is playing
-    if white == "KempBrdy":
-        if result == "1-0":
-            white_wins += 1
-        elif result == "0-1":
-            black_wins += 1
-        elif result == "1/2-1/2":
-            draws += 1
-    elif black == "KempBrdy":
-        if result == "0-1":
-            white_wins += 1
-        elif result == "1-0":
-            black_wins += 1
-        elif result == "1/2-1/2":
-            draws += 1
-    
-    time_controls.append(time_control)
-    
-    # Extract opening moves (first 5 moves)
-    if move_line:
-        moves = move_line.split()
-        first_5_moves = []
-        for move in moves[:10]:  # First 5 moves for each side
-            if '.' not in move and move not in ['1-0', '0-1', '1/2-1/2']:
-                first_5_moves.append(move)
-        
-        if first_5_moves:
-            opening_moves.append(' '.join(first_5_moves))
-        
-        # Check for tactical patterns
-        move_text = ' '.join(moves)
-        
-        # Common tactical patterns in bullet chess
-        if 'Nx' in move_text and '+' not in move_text:
-            tactical_patterns.append('capture_knight')
-        if 'Bx' in move_text and '+' not in move_text:
-            tactical_patterns.append('capture_bishop')
-        if 'Qx' in move_text and '+' not in move_text:
-            tactical_patterns.append('capture_queen')
-        if '+#' in move_text or '#' in move_text:
-            tactical_patterns.append('checkmate')
-        elif '+' in move_text:
-            tactical_patterns.append('check')
-        if 'O-O' in move_text or 'O-O-O' in move_text:
-            tactical_patterns.append('castling')
-
-print(f"Kemp Brdy Statistics:")
-print(f"Wins: {white_wins}, Losses: {black_wins}, Draws: {draws}")
-total_games = white_wins + black_wins + draws
-if total_games > 0:
-    print(f"Win Rate: {white_wins/total_games*100:.1f}%")
-print()
-
-# Most common openings
-print("Most Common Opening Sequences:")
-opening_counter = Counter(opening_moves)
-for opening, count in opening_counter.most_common(5):
-    print(f"  {opening}: {count} times")
-print()
-
-# Tactical patterns
-print("Tactical Patterns:")
-pattern_counter = Counter(tactical_patterns)
-for pattern, count in pattern_counter.most_common():
-    print(f"  {pattern}: {count} times")
-print()
-
-# Time controls
-print("Time Controls:")
-tc_counter = Counter(time_controls)
-for tc, count in tc_counter.most_common():
-    print(f"  {tc}: {count} games")
\ No newline at end of file
+    for match in PGN_TOKEN_RE.finditer(pgn_buffer):
+        tag, value, moves = match.groups()
+        if tag is not None:
+            if move_line:
+                # A new header block starts the next game
+                yield headers, move_line
+                headers = {}
+                move_line = ""
+            headers[tag.decode()] = value.decode()
+        elif not move_line:
+            move_line = moves.decode().strip()
+
+    if headers or move_line:
+        yield headers, move_line
+
+
+def find_shards(pgn_buffer, shard_count):
+    """Split a PGN buffer into (start, end) byte ranges on game boundaries"""
+    size = len(pgn_buffer)
+    starts = [0]
+    for i in range(1, shard_count):
+        # Snap each cut forward to the next header block after a blank line
+        match = GAME_START_RE.search(pgn_buffer, size * i // shard_count)
+        if match and match.end() > starts[-1]:
+            starts.append(match.end())
+    return list(zip(starts, starts[1:] + [size]))
+
+
+def analyze_shard(shard_range):
+    """Analyze the games in one byte range of the PGN file"""
+    start, end = shard_range
+    stats = Counter()
+    opening_counter = Counter()
+    pattern_counter = Counter()
+    tc_counter = Counter()
+
+    # Memory-map the PGN so only the pages being scanned are resident
+    with open(PGN_PATH, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as pgn_map, \
+            memoryview(pgn_map) as view, view[start:end] as shard:
+        for headers, move_line in read_games(shard):
+            stats['games'] += 1
+
+            # Extract game info
+            white = headers.get('White', 'Unknown')
+            black = headers.get('Black', 'Unknown')
+            result = headers.get('Result', '*')
+            time_control = headers.get('TimeControl', 'Unknown')
+
+            # Count results when Kemp Brdy is playing
+            if white == "KempBrdy":
+                if result == "1-0":
+                    stats['wins'] += 1
+                elif result == "0-1":
+                    stats['losses'] += 1
+                elif result == "1/2-1/2":
+                    stats['draws'] += 1
+            elif black == "KempBrdy":
+                if result == "0-1":
+                    stats['wins'] += 1
+                elif result == "1-0":
+                    stats['losses'] += 1
+                elif result == "1/2-1/2":
+                    stats['draws'] += 1
+
+            tc_counter[time_control] += 1
+
+            # Extract opening moves (first 5 moves)
+            if move_line:
+                moves = move_line.split()
+                first_5_moves = []
+                for move in moves[:10]:  # First 5 moves for each side
+                    if '.' not in move and move not in ['1-0', '0-1', '1/2-1/2']:
+                        first_5_moves.append(move)
+
+                if first_5_moves:
+                    opening_counter[' '.join(first_5_moves)] += 1
+
+                pattern_counter.update(match.lastgroup for match in TACTICAL_RE.finditer(move_line))
+
+    return stats, opening_counter, pattern_counter, tc_counter
+
+
+if __name__ == '__main__':
+    # An empty file cannot be memory-mapped and has no games to shard
+    shard_ranges = []
+    if os.path.getsize(PGN_PATH) > 0:
+        with open(PGN_PATH, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as pgn_map:
+            shard_ranges = find_shards(pgn_map, os.cpu_count() or 1)
+
+    # Games are independent, so shards are analyzed in parallel and merged
+    stats, opening_counter, pattern_counter, tc_counter = \
+        Counter(), Counter(), Counter(), Counter()
+    if shard_ranges:
+        with Pool(min(len(shard_ranges), os.cpu_count() or 1)) as pool:
+            for shard_counters in pool.imap_unordered(analyze_shard, shard_ranges):
+                for total, partial in zip((stats, opening_counter, pattern_counter, tc_counter),
+                                          shard_counters):
+                    total.update(partial)
+
+    wins, losses, draws = stats['wins'], stats['losses'], stats['draws']
+
+    print(f"Found {stats['games']} games")
+    print("=" * 50)
+
+    print(f"Kemp Brdy Statistics:")
+    print(f"Wins: {wins}, Losses: {losses}, Draws: {draws}")
+    total_games = wins + losses + draws
+    if total_games > 0:
+        print(f"Win Rate: {wins/total_games*100:.1f}%")
+    print()
+
+    # Most common openings
+    print("Most Common Opening Sequences:")
+    for opening, count in opening_counter.most_common(5):
+        print(f"  {opening}: {count} times")
+    print()
+
+    # Tactical patterns
+    print("Tactical Patterns:")
+    for pattern, count in pattern_counter.most_common():
+        print(f"  {pattern}: {count} times")
+    print()
+
+    # Time controls
+    print("Time Controls:")
+    for tc, count in tc_counter.most_common():
+        print(f"  {tc}: {count} games")
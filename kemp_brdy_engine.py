@@ -1,8 +1,55 @@
+import heapq
 import random
 import time
 import chess
 import chess.engine
-from typing import List, Tuple, Optional
+import chess.polyglot
+from typing import Dict, List, Optional, Tuple
+
+# Square sets used by the move heuristics, as bitboards
+CENTER_MASK = chess.BB_D4 | chess.BB_E4 | chess.BB_D5 | chess.BB_E5
+CASTLE_FROM_MASK = chess.BB_E1 | chess.BB_E8
+CASTLE_TO_MASK = chess.BB_G1 | chess.BB_C1 | chess.BB_G8 | chess.BB_C8
+
+# Per-piece-type lookups, indexed by chess.PAWN (1) .. chess.KING (6)
+PIECE_VALUES = (0, 1, 3, 3, 5, 9, 0)
+CAPTURE_NAMES = (None, 'capture_pawn', 'capture_knight', 'capture_bishop',
+                 'capture_rook', 'capture_queen', 'capture_king')
+
+# A position counts as opening while each side has developed (moved off
+# its home square) at most this many pieces and kept the rest at home
+OPENING_MAX_DEVELOPED = 3
+
+# Starting squares of each piece type (both colors) and of each side
+HOME_PAWNS = chess.BB_RANK_2 | chess.BB_RANK_7
+HOME_KNIGHTS = chess.BB_B1 | chess.BB_G1 | chess.BB_B8 | chess.BB_G8
+HOME_BISHOPS = chess.BB_C1 | chess.BB_F1 | chess.BB_C8 | chess.BB_F8
+HOME_ROOKS = chess.BB_A1 | chess.BB_H1 | chess.BB_A8 | chess.BB_H8
+HOME_QUEENS = chess.BB_D1 | chess.BB_D8
+HOME_KINGS = chess.BB_E1 | chess.BB_E8
+HOME_WHITE = chess.BB_RANK_1 | chess.BB_RANK_2
+HOME_BLACK = chess.BB_RANK_7 | chess.BB_RANK_8
+
+# Evaluation cache slots (power of two so the Zobrist key can be masked)
+EVAL_CACHE_SIZE = 1 << 12
+
+# Search transposition table slots and entry bound types
+SEARCH_TT_SIZE = 1 << 14
+TT_EXACT, TT_LOWER, TT_UPPER = 0, 1, 2
+
+# Number of best candidates kept for move selection
+TOP_MOVES = 5
+
+# Search values are in material units; mate outranks any material swing
+MATE_SCORE = 1000.0
+
+# Style points per pawn of material won or lost by the search
+SEARCH_MATERIAL_WEIGHT = 10
+
+
+class _SearchTimeout(Exception):
+    """Raised inside the search when the move deadline passes"""
+
 
 class KempBrdyEngine:
     """
@@ -10,14 +57,19 @@ class KempBrdyEngine:
     Analyzed from 4,654 games with specific tactical patterns
     """
     
-    def __init__(self, difficulty_level: int = 5):
+    def __init__(self, difficulty_level: int = 5, seed: Optional[int] = None):
         """
         Initialize the Kemp Brdy-style engine
         
         Args:
             difficulty_level: 1-10 scale for engine strength
+            seed: Optional seed for reproducible move selection
         """
         self.difficulty = difficulty_level
+        self._rng = random.Random(seed)
+        
+        # Static candidate scores per position, always-replace on collision
+        self._eval_cache: List[Optional[Tuple[int, List[float]]]] = [None] * EVAL_CACHE_SIZE
         self.time_limit = 0.1  # Bullet chess - very fast decisions
         self.max_thinking_time = 0.5  # Maximum time for complex positions
         
@@ -44,6 +96,7 @@ class KempBrdyEngine:
                 ['e4', 'c6', 'd4', 'd5', 'exd5', 'cxd5']
             ]
         }
+        self._book = self._build_opening_book()
         
         # Tactical preferences based on analysis
         self.tactical_weights = {
@@ -57,6 +110,11 @@ class KempBrdyEngine:
             'center_control': 0.7,  # Good priority on center squares
             'aggression': 0.9       # Very aggressive play style
         }
+        
+        # Alpha-beta search settings, refined by iterative deepening
+        self.search_depth = 2
+        self._deadline = 0.0
+        self._search_tt: List[Optional[Tuple[int, int, float, int, Optional[chess.Move]]]] = [None] * SEARCH_TT_SIZE
     
     def get_move(self, board: chess.Board) -> Optional[chess.Move]:
         """
@@ -81,152 +139,379 @@ class KempBrdyEngine:
         if not legal_moves:
             return None
         
-        # Score moves based on Kemp Brdy's preferences
-        scored_moves = []
-        for move in legal_moves:
-            score = self._evaluate_move(board, move)
-            scored_moves.append((score, move))
+        # Score moves based on Kemp Brdy's preferences; scores[i] belongs
+        # to legal_moves[i]. Repeated positions reuse their cached scores.
+        key = chess.polyglot.zobrist_hash(board)
+        slot = key & (EVAL_CACHE_SIZE - 1)
+        entry = self._eval_cache[slot]
+        if entry is not None and entry[0] == key:
+            static_scores = entry[1]
+        else:
+            # Material is swept once here; each candidate only adds its own delta
+            base_material = self._evaluate_material(board)
+            
+            # Direction of play for the side to move: +1 white, -1 black
+            sign = 1 if board.turn == chess.WHITE else -1
+            
+            static_scores = [
+                self._evaluate_move(board, move, base_material, sign)
+                for move in legal_moves
+            ]
+            self._eval_cache[slot] = (key, static_scores)
         
-        # Sort by score (descending)
-        scored_moves.sort(reverse=True, key=lambda x: x[0])
+        # Bullet chaos: noise in [-5, 5) scaled by difficulty, drawn straight
+        # from the engine's generator rather than through random.uniform
+        noise_span = 10 * (11 - self.difficulty)
+        rng_random = self._rng.random
+        scores = [score + (rng_random() - 0.5) * noise_span for score in static_scores]
+        
+        # Look ahead at the opponent's replies while time allows
+        self._deadline = start_time + self.time_limit * 0.75
+        scores = self._search_root(board, legal_moves, scores)
+        
+        # Only the top moves matter, so select them in O(N log k) with a
+        # bounded heap instead of fully sorting in O(N log N)
+        top_indices = heapq.nlargest(TOP_MOVES, range(len(scores)), key=scores.__getitem__)
         
         # Add randomness based on difficulty
         if self.difficulty < 7:
             # Lower difficulty = more randomness
-            scored_moves = self._add_randomness(scored_moves)
+            top_indices = self._add_randomness(top_indices)
         
         # Select best move within time limit
-        best_score, best_move = scored_moves[0]
+        best_move = legal_moves[top_indices[0]]
         
         # Ensure we don't exceed time limits for bullet
         if time.time() - start_time > self.time_limit:
             # Fallback to any legal move if time exceeded
-            return random.choice(legal_moves)
+            return self._rng.choice(legal_moves)
         
         return best_move
     
-    def _get_opening_move(self, board: chess.Board) -> Optional[chess.Move]:
-        """Get moves from Kemp Brdy's opening repertoire"""
-        move_count = len(board.move_stack)
+    def _search_root(self, board: chess.Board, legal_moves: List[chess.Move],
+                     scores: List[float]) -> List[float]:
+        """
+        Refine candidate scores with iterative-deepening alpha-beta
+        
+        Each candidate keeps its style score and gains the material swing
+        the search finds from the current position, including material the
+        candidate itself wins by capture or promotion. Only the top candidates need exact
+        values, so the rest are searched against the weakest of them and
+        may return bounds. The last fully completed depth is returned, or
+        the unsearched style scores if even depth 1 runs out of time.
+        """
+        order = sorted(range(len(legal_moves)), key=scores.__getitem__, reverse=True)
+        result = scores
         
-        if move_count > 6:  # Only use for first 6 moves
-            return None
+        # Material before any candidate is played, from our point of view
+        sign = 1 if board.turn == chess.WHITE else -1
+        material_before = sign * self._evaluate_material(board)
         
-        # Determine if we're white or black
-        is_white = board.turn == chess.WHITE
+        for depth in range(1, self.search_depth + 1):
+            totals = list(scores)
+            kept: List[float] = []  # min-heap of the best totals so far
+            try:
+                for i in order:
+                    board.push(legal_moves[i])
+                    try:
+                        beta = float('inf')
+                        if len(kept) == TOP_MOVES:
+                            beta = -((kept[0] - scores[i]) / SEARCH_MATERIAL_WEIGHT + material_before)
+                        value = -self._alphabeta(board, depth - 1, float('-inf'), beta)
+                    finally:
+                        board.pop()
+                    
+                    totals[i] = scores[i] + SEARCH_MATERIAL_WEIGHT * (value - material_before)
+                    if len(kept) < TOP_MOVES:
+                        heapq.heappush(kept, totals[i])
+                    elif totals[i] > kept[0]:
+                        heapq.heapreplace(kept, totals[i])
+            except _SearchTimeout:
+                break
+            
+            result = totals
+            # Search the next depth in this depth's best-first order
+            order.sort(key=totals.__getitem__, reverse=True)
         
-        # Select a random opening from repertoire
-        if is_white:
-            openings = self.opening_repertoire['white']
+        return result
+    
+    def _alphabeta(self, board: chess.Board, depth: int, alpha: float, beta: float) -> float:
+        """Negamax alpha-beta over material, from the side to move's view"""
+        if time.time() > self._deadline:
+            raise _SearchTimeout
+        
+        sign = 1 if board.turn == chess.WHITE else -1
+        if depth == 0:
+            return self._quiescence(board, alpha, beta)
+        
+        # Transposition table probe
+        key = chess.polyglot.zobrist_hash(board)
+        slot = key & (SEARCH_TT_SIZE - 1)
+        entry = self._search_tt[slot]
+        tt_move = None
+        if entry is not None and entry[0] == key:
+            _, tt_depth, tt_value, tt_flag, tt_move = entry
+            if tt_depth >= depth:
+                if tt_flag == TT_EXACT:
+                    return tt_value
+                if tt_flag == TT_LOWER and tt_value >= beta:
+                    return tt_value
+                if tt_flag == TT_UPPER and tt_value <= alpha:
+                    return tt_value
+        
+        moves = list(board.legal_moves)
+        if not moves:
+            return -MATE_SCORE if board.is_check() else 0.0
+        
+        # Order by the style heuristic, previous best move first
+        base_material = self._evaluate_material(board)
+        moves.sort(key=lambda move: self._evaluate_move(board, move, base_material, sign), reverse=True)
+        if tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+        
+        alpha_orig = alpha
+        best_value = float('-inf')
+        best_move = None
+        for move in moves:
+            board.push(move)
+            try:
+                value = -self._alphabeta(board, depth - 1, -beta, -alpha)
+            finally:
+                board.pop()
+            
+            if value > best_value:
+                best_value = value
+                best_move = move
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                break  # Beta cutoff
+        
+        if best_value <= alpha_orig:
+            flag = TT_UPPER
+        elif best_value >= beta:
+            flag = TT_LOWER
         else:
-            openings = self.opening_repertoire['black']
+            flag = TT_EXACT
+        self._search_tt[slot] = (key, depth, best_value, flag, best_move)
         
-        chosen_opening = random.choice(openings)
-        
-        if move_count < len(chosen_opening):
+        return best_value
+    
+    def _quiescence(self, board: chess.Board, alpha: float, beta: float) -> float:
+        """Resolve pending captures so leaf material is not mid-exchange"""
+        if time.time() > self._deadline:
+            raise _SearchTimeout
+        
+        in_check = board.is_check()
+        if in_check:
+            # No standing pat in check; every evasion must be tried
+            moves = list(board.legal_moves)
+            if not moves:
+                return -MATE_SCORE
+            best_value = float('-inf')
+        else:
+            # Stand pat: the side to move may decline every capture
+            sign = 1 if board.turn == chess.WHITE else -1
+            best_value = sign * self._evaluate_material(board)
+            if best_value >= beta:
+                return best_value
+            if best_value > alpha:
+                alpha = best_value
+            moves = list(board.generate_legal_captures())
+        
+        # Most valuable victim first, least valuable attacker breaking ties
+        moves.sort(key=lambda move: self._capture_order(board, move), reverse=True)
+        
+        for move in moves:
+            board.push(move)
             try:
-                expected_move_san = chosen_opening[move_count]
-                return board.parse_san(expected_move_san)
-            except ValueError:
-                pass  # Move not legal, continue with normal evaluation
+                value = -self._quiescence(board, -beta, -alpha)
+            finally:
+                board.pop()
+            
+            if value > best_value:
+                best_value = value
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                break  # Beta cutoff
+        
+        return best_value
+    
+    def _capture_order(self, board: chess.Board, move: chess.Move) -> int:
+        """MVV-LVA ordering key for captures (quiet moves sort last)"""
+        if board.is_en_passant(move):
+            victim = chess.PAWN
+        else:
+            victim = board.piece_type_at(move.to_square)
+            if victim is None:
+                return 0
+        return PIECE_VALUES[victim] * 10 - PIECE_VALUES[board.piece_type_at(move.from_square)]
+    
+    def _build_opening_book(self) -> Dict[int, List[chess.Move]]:
+        """Pre-parse the opening repertoire into moves keyed by position hash"""
+        book: Dict[int, List[chess.Move]] = {}
+        for side, color in (('white', chess.WHITE), ('black', chess.BLACK)):
+            for line in self.opening_repertoire[side]:
+                board = chess.Board()
+                for san in line:
+                    move = board.parse_san(san)
+                    # Only book our own moves; one entry per line keeps the
+                    # choice between lines uniform
+                    if board.turn == color:
+                        book.setdefault(chess.polyglot.zobrist_hash(board), []).append(move)
+                    board.push(move)
+        return book
+    
+    def _get_opening_move(self, board: chess.Board) -> Optional[chess.Move]:
+        """Get moves from Kemp Brdy's opening repertoire"""
+        moves = self._book.get(chess.polyglot.zobrist_hash(board))
+        if moves:
+            return self._rng.choice(moves)
         
         return None
     
-    def _evaluate_move(self, board: chess.Board, move: chess.Move) -> float:
+    def _evaluate_move(self, board: chess.Board, move: chess.Move,
+                       base_material: float, sign: int) -> float:
         """
         Evaluate a move based on Kemp Brdy's playing style
+        
+        The move is scored from the pre-move position; the board is only
+        pushed to confirm checkmate when the move gives check.
         """
+        # Opening positions get the cheaper specialised scorer. The phase is
+        # read from the position itself, so scores cached by Zobrist key
+        # always come from the same scorer.
+        if self._is_opening_position(board):
+            return self._book_score(board, move, sign)
+        
         score = 0.0
         
-        # Make the move to analyze
-        board.push(move)
+        # Resolve the pieces involved once, before the from-square is vacated
+        moving_piece = board.piece_at(move.from_square)
+        captured_piece = self._captured_piece(board, move)
         
-        try:
+        gives_check = board.gives_check(move)
+        if gives_check:
             # Check for checkmate (highest priority)
-            if board.is_checkmate():
+            board.push(move)
+            try:
+                is_mate = board.is_checkmate()
+            finally:
+                board.pop()
+            if is_mate:
                 return 1000.0 + self.tactical_weights['checkmate'] * 100
             
             # Check for giving check
-            if board.is_check():
-                score += self.tactical_weights['check'] * 50
-            
-            # Piece capture analysis
-            captured_piece = board.piece_at(move.to_square)
-            if captured_piece:
-                capture_value = self._get_piece_value(captured_piece)
-                capture_type = self._get_piece_type(captured_piece)
-                
-                if capture_type in self.tactical_weights:
-                    score += self.tactical_weights[capture_type] * capture_value * 10
-                else:
-                    score += capture_value * 5
-            
-            # Development bonus
-            if self._is_development_move(board, move):
-                score += self.tactical_weights['development'] * 15
-            
-            # Center control bonus
+            score += self.tactical_weights['check'] * 50
+        
+        # Piece capture analysis
+        if captured_piece:
+            score += self._capture_score(captured_piece.piece_type)
+        
+        # Development bonus
+        if self._is_development_move(moving_piece, move):
+            score += self.tactical_weights['development'] * 15
+        
+        # Center control bonus
+        if self._controls_center(move.to_square):
+            score += self.tactical_weights['center_control'] * 10
+        
+        # Castling bonus
+        if (moving_piece.piece_type == chess.KING
+                and chess.BB_SQUARES[move.from_square] & CASTLE_FROM_MASK
+                and chess.BB_SQUARES[move.to_square] & CASTLE_TO_MASK):
+            score += self.tactical_weights['castling'] * 20
+        
+        # Aggression bonus - moves towards opponent's king
+        if self._is_aggressive_move(move, sign):
+            score += self.tactical_weights['aggression'] * 12
+        
+        # Queen activity bonus (Kemp Brdy likes active queens)
+        if moving_piece.piece_type == chess.QUEEN:
+            score += 8  # Bonus for queen moves
             if self._controls_center(move.to_square):
-                score += self.tactical_weights['center_control'] * 10
-            
-            # Castling bonus
-            if move.from_square in [chess.E1, chess.E8] and move.to_square in [chess.G1, chess.C1, chess.G8, chess.C8]:
-                score += self.tactical_weights['castling'] * 20
-            
-            # Aggression bonus - moves towards opponent's king
-            if self._is_aggressive_move(board, move):
-                score += self.tactical_weights['aggression'] * 12
-            
-            # Queen activity bonus (Kemp Brdy likes active queens)
-            if board.piece_at(move.from_square) and board.piece_at(move.from_square).piece_type == chess.QUEEN:
-                score += 8  # Bonus for queen moves
-                if self._controls_center(move.to_square):
-                    score += 5  # Extra bonus for queen in center
-            
-            # Material evaluation
-            score += self._evaluate_material(board)
-            
-            # Position evaluation
-            score += self._evaluate_position(board)
-            
-        finally:
-            board.pop()
+                score += 5  # Extra bonus for queen in center
+        
+        # Material evaluation of the resulting position (white's point of view)
+        material = base_material
+        if captured_piece:
+            material += sign * PIECE_VALUES[captured_piece.piece_type]
+        if move.promotion:
+            material += sign * (PIECE_VALUES[move.promotion] - 1)
+        score += material
         
-        # Add some randomness for bullet chaos
-        score += random.uniform(-5, 5) * (11 - self.difficulty)
+        # Position evaluation
+        score += self._evaluate_position(gives_check)
         
         return score
     
-    def _get_piece_value(self, piece: chess.Piece) -> int:
-        """Get numerical value of a piece"""
-        values = {
-            chess.PAWN: 1,
-            chess.KNIGHT: 3,
-            chess.BISHOP: 3,
-            chess.ROOK: 5,
-            chess.QUEEN: 9,
-            chess.KING: 0
-        }
-        return values.get(piece.piece_type, 0)
+    def _is_opening_position(self, board: chess.Board) -> bool:
+        """
+        Check if both sides still have most pieces on their home squares
+        
+        Both conditions are needed: few pieces off home squares alone
+        would also match sparse endgames.
+        """
+        home = ((board.pawns & HOME_PAWNS) | (board.knights & HOME_KNIGHTS)
+                | (board.bishops & HOME_BISHOPS) | (board.rooks & HOME_ROOKS)
+                | (board.queens & HOME_QUEENS) | (board.kings & HOME_KINGS))
+        white = board.occupied_co[chess.WHITE]
+        black = board.occupied_co[chess.BLACK]
+        white_home = chess.popcount(white & home & HOME_WHITE)
+        black_home = chess.popcount(black & home & HOME_BLACK)
+        return (white_home >= 16 - OPENING_MAX_DEVELOPED
+                and black_home >= 16 - OPENING_MAX_DEVELOPED
+                and chess.popcount(white) - white_home <= OPENING_MAX_DEVELOPED
+                and chess.popcount(black) - black_home <= OPENING_MAX_DEVELOPED)
     
-    def _get_piece_type(self, piece: chess.Piece) -> str:
-        """Get piece type name for tactical weights"""
-        type_names = {
-            chess.PAWN: 'capture_pawn',
-            chess.KNIGHT: 'capture_knight',
-            chess.BISHOP: 'capture_bishop',
-            chess.ROOK: 'capture_rook',
-            chess.QUEEN: 'capture_queen',
-            chess.KING: 'capture_king'
-        }
-        return type_names.get(piece.piece_type, 'capture_pawn')
+    def _captured_piece(self, board: chess.Board, move: chess.Move) -> Optional[chess.Piece]:
+        """Get the piece a move captures, including en passant"""
+        if board.is_en_passant(move):
+            return chess.Piece(chess.PAWN, not board.turn)
+        return board.piece_at(move.to_square)
     
-    def _is_development_move(self, board: chess.Board, move: chess.Move) -> bool:
-        """Check if move develops a piece"""
-        piece = board.piece_at(move.from_square)
-        if not piece:
-            return False
+    def _book_score(self, board: chess.Board, move: chess.Move, sign: int) -> float:
+        """
+        Score a move in an off-book opening position
+        
+        Only the capture and piece-placement terms are scored. The check,
+        material and position terms are skipped, even though material may
+        already be uneven (e.g. 1.e4 d5 2.exd5); the search on top still
+        accounts for material, mates and hanging pieces.
+        """
+        score = 0.0
+        
+        # Piece capture analysis
+        captured_piece = self._captured_piece(board, move)
+        if captured_piece:
+            score += self._capture_score(captured_piece.piece_type)
         
+        # Development bonus
+        if self._is_development_move(board.piece_at(move.from_square), move):
+            score += self.tactical_weights['development'] * 15
+        
+        # Center control bonus
+        if self._controls_center(move.to_square):
+            score += self.tactical_weights['center_control'] * 10
+        
+        # Aggression bonus - moves towards opponent's king
+        if self._is_aggressive_move(move, sign):
+            score += self.tactical_weights['aggression'] * 12
+        
+        return score
+    
+    def _capture_score(self, piece_type: chess.PieceType) -> float:
+        """Capture bonus for a captured piece type, from the current weights"""
+        value = PIECE_VALUES[piece_type]
+        weight = self.tactical_weights.get(CAPTURE_NAMES[piece_type])
+        if weight is not None:
+            return weight * value * 10
+        return value * 5
+    
+    def _is_development_move(self, piece: chess.Piece, move: chess.Move) -> bool:
+        """Check if move develops a piece"""
         # Knight/Bishop moves from back rank are development
         if piece.piece_type in [chess.KNIGHT, chess.BISHOP]:
             if piece.color == chess.WHITE and move.from_square in [chess.B1, chess.C1, chess.F1, chess.G1]:
@@ -238,62 +523,47 @@ class KempBrdyEngine:
     
     def _controls_center(self, square: chess.Square) -> bool:
         """Check if square controls center"""
-        center_squares = [chess.D4, chess.E4, chess.D5, chess.E5]
-        return square in center_squares
+        return bool(chess.BB_SQUARES[square] & CENTER_MASK)
     
-    def _is_aggressive_move(self, board: chess.Board, move: chess.Move) -> bool:
+    def _is_aggressive_move(self, move: chess.Move, sign: int) -> bool:
         """Check if move is aggressive (towards opponent's territory)"""
-        if board.turn == chess.WHITE:  # We just moved white
-            # White moves up the board (higher rank numbers)
-            return chess.square_rank(move.to_square) > chess.square_rank(move.from_square)
-        else:  # We just moved black
-            # Black moves down the board (lower rank numbers)
-            return chess.square_rank(move.to_square) < chess.square_rank(move.from_square)
+        # Rank is square >> 3; sign is +1 for white and -1 for black, so
+        # advancing in either direction yields a positive product
+        return ((move.to_square >> 3) - (move.from_square >> 3)) * sign > 0
     
     def _evaluate_material(self, board: chess.Board) -> float:
         """Simple material evaluation"""
-        score = 0
-        for square, piece in board.piece_map().items():
-            value = self._get_piece_value(piece)
-            if piece.color == chess.WHITE:
-                score += value
-            else:
-                score -= value
-        return score
+        # Popcounts over the piece bitboards, white minus black
+        popcount = chess.popcount
+        white = board.occupied_co[chess.WHITE]
+        black = board.occupied_co[chess.BLACK]
+        pawns, knights, bishops = board.pawns, board.knights, board.bishops
+        rooks, queens = board.rooks, board.queens
+        return ((popcount(pawns & white) - popcount(pawns & black))
+                + 3 * (popcount(knights & white) + popcount(bishops & white)
+                       - popcount(knights & black) - popcount(bishops & black))
+                + 5 * (popcount(rooks & white) - popcount(rooks & black))
+                + 9 * (popcount(queens & white) - popcount(queens & black)))
     
-    def _evaluate_position(self, board: chess.Board) -> float:
+    def _evaluate_position(self, gives_check: bool) -> float:
         """Basic positional evaluation"""
         score = 0
         
         # King safety (simplified)
-        if not board.is_check():
+        if not gives_check:
             score += 10
         
-        # Mobility bonus
-        legal_moves = len(list(board.legal_moves))
-        score += legal_moves * 0.5
-        
         return score
     
-    def _add_randomness(self, scored_moves: List[Tuple[float, chess.Move]]) -> List[Tuple[float, chess.Move]]:
+    def _add_randomness(self, top_indices: List[int]) -> List[int]:
         """Add randomness based on difficulty level"""
         if self.difficulty >= 9:
-            return scored_moves  # No randomness at high levels
-        
-        # Randomness factor (lower difficulty = more randomness)
-        random_factor = (10 - self.difficulty) / 10
+            return top_indices  # No randomness at high levels
         
         # Shuffle top moves
-        top_moves = scored_moves[:min(5, len(scored_moves))]
-        random.shuffle(top_moves)
-        
-        # Combine with remaining moves
-        if len(scored_moves) > 5:
-            result = top_moves + scored_moves[5:]
-        else:
-            result = top_moves
-        
-        return result
+        shuffled = list(top_indices)
+        self._rng.shuffle(shuffled)
+        return shuffled
     
     def get_engine_info(self) -> dict:
         """Get information about the engine"""
@@ -336,4 +606,10 @@ if __name__ == "__main__":
         else:
             break
     
-    print(f"\nFinal position FEN: {board.fen()}")
\ No newline at end of file
+    print(f"\nFinal position FEN: {board.fen()}")
+    
+    # Sparse endgames must take the full scorer, not the opening one
+    for fen in ['8/4P1k1/8/8/8/8/6K1/8 w - - 0 1',
+                '4k3/8/8/8/8/8/8/R3K3 w - - 0 1',
+                '8/8/8/8/8/5k2/r7/4K3 b - - 0 1']:
+        assert not engine._is_opening_position(chess.Board(fen)), fen
\ No newline at end of file